@@ -0,0 +1,57 @@
+"""Uji lokal mode coordinator/worker tanpa GitHub/proxy asli.
+
+Coordinator menjalankan beberapa worker di localhost dengan fungsi cek palsu; satu worker
+sengaja crash di tengah shard untuk menguji pengambilalihan lease. Jalankan:
+
+    python distributed_selftest.py
+"""
+import os
+import sys
+import threading
+import time
+import main
+
+SELFTEST_PROXY_COUNT = 1000
+SELFTEST_WORKERS = 3
+SELFTEST_DB_FILE = "selftest_queue.db"
+CRASH_LOCK_FILE = "selftest_crash.lock"
+CRASH_AFTER_CHECKS = 30
+
+def fake_check(proxy):
+    time.sleep(0.01)
+    if proxy.endswith(".7:80"): return proxy, False, "Timeout (20s)"
+    return proxy, True, "OK"
+
+def run_selftest_worker(address):
+    # Worker pertama yang mendapat lock akan crash setelah beberapa cek
+    try: os.close(os.open(CRASH_LOCK_FILE, os.O_CREAT | os.O_EXCL)); crash_after = CRASH_AFTER_CHECKS
+    except FileExistsError: crash_after = None
+    checked = 0; lock = threading.Lock()
+    def check(proxy):
+        nonlocal checked
+        with lock: checked += 1; should_crash = crash_after is not None and checked >= crash_after
+        if should_crash: os._exit(1)
+        return fake_check(proxy)
+    main.run_distributed_worker(address, check_function=check)
+
+def run_selftest():
+    main.SHARD_SIZE = 50; main.SHARD_LEASE_SECONDS = 3
+    proxies = [f"http://u:p@10.0.{i // 250}.{i % 250}:80" for i in range(SELFTEST_PROXY_COUNT)]
+    if os.path.exists(CRASH_LOCK_FILE): os.remove(CRASH_LOCK_FILE)
+    seen = {}; started = time.time()
+    try:
+        for proxy, is_good, message in main.iter_distributed_results(proxies, SELFTEST_DB_FILE, local_workers=SELFTEST_WORKERS, port=0, worker_command=[sys.executable, os.path.abspath(__file__), main.WORKER_FLAG]):
+            seen[proxy] = seen.get(proxy, 0) + 1
+            if (proxy, is_good, message) != fake_check(proxy): main.ui.console.print(f"[bold red]Hasil salah: {proxy} {message}[/bold red]"); return False
+    finally:
+        if os.path.exists(CRASH_LOCK_FILE): os.remove(CRASH_LOCK_FILE)
+    missing = [p for p in proxies if p not in seen]; duplicates = [p for p, n in seen.items() if n > 1]
+    ok = not missing and not duplicates and len(seen) == len(proxies)
+    style = "bold green" if ok else "bold red"
+    main.ui.console.print(f"[{style}]{len(seen)}/{len(proxies)} hasil, {len(missing)} hilang, {len(duplicates)} duplikat ({time.time() - started:.1f}s)[/{style}]")
+    return ok
+
+if __name__ == "__main__":
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    if main.WORKER_FLAG in sys.argv: run_selftest_worker(sys.argv[sys.argv.index(main.WORKER_FLAG) + 1])
+    else: sys.exit(0 if run_selftest() else 1)
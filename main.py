@@ -6,6 +6,17 @@ import time
 import re
 import sys
 import json
+import hashlib
+import ipaddress
+import threading
+import socket
+import sqlite3
+import hmac
+import secrets
+import socketserver
+import subprocess
+from urllib.parse import urlsplit
+from contextlib import closing
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
 import ui  # Mengimpor semua fungsi UI dari file ui.py
@@ -19,6 +30,9 @@ FAIL_PROXY_FILE = "fail_proxy.txt"
 SUCCESS_PROXY_FILE = "success_proxy.txt"
 PROXY_BACKUP_FILE = "proxy_backup.txt"
 WEBSHARE_APIKEYS_FILE = "apikeys.txt"
+CHECK_JOURNAL_FILE = "check_journal.jsonl"
+WEBSHARE_CACHE_FILE = "webshare_cache.json"
+RESUME_FLAG = "--resume"
 
 # --- Konfigurasi Webshare (BARU) ---
 WEBSHARE_AUTH_URL = "https://proxy.webshare.io/api/v2/proxy/ipauthorization/"
@@ -28,14 +42,42 @@ WEBSHARE_PROFILE_URL = "https://proxy.webshare.io/api/v2/profile/"
 WEBSHARE_DOWNLOAD_URL_BASE = "https://proxy.webshare.io/api/v2/proxy/list/download/{token}/-/any/username/direct/-/"
 WEBSHARE_DOWNLOAD_URL_FORMAT = WEBSHARE_DOWNLOAD_URL_BASE + "?plan_id={plan_id}"
 IP_CHECK_SERVICE_URL = "https://api.ipify.org?format=json"
+WEBSHARE_API_TIMEOUT = 30
+WEBSHARE_CACHE_TTL = 6 * 3600 # Detik; metadata akun (email, plan ID, token download)
 # --- AKHIR KONFIGURASI BARU ---
 
 # --- PERUBAHAN UTAMA UNTUK TES PROXY ---
 PROXY_TIMEOUT = 20
 MAX_WORKERS = 15
+GITHUB_TOKENS_FILE = "github_tokens.txt" # Token GitHub di baris ke-3 (dipisah koma, yang pertama dipakai)
+GITHUB_API_TEST_URL = "https://api.github.com/rate_limit" # Butuh auth, tidak mengurangi kuota rate limit
+GITHUB_TEST_TOKEN = None # Diisi load_github_token()
 CHECK_URLS = ["https://api.ipify.org", "http://httpbin.org/ip"]
 # --- AKHIR PERUBAHAN ---
 
+# --- Cluster subnet (sampling) ---
+CLUSTER_MIN_SIZE = 8 # Cluster lebih kecil dari ini dites penuh tanpa sampling
+CLUSTER_SAMPLE_SIZE = 3
+CLUSTER_DOWN_REASONS = ("Timeout", "Proxy Error", "Koneksi Gagal") # Gagal jaringan (pesan berisi "407" tetap dianggap gagal kredensial)
+CLUSTER_DOWN_MESSAGE = "Cluster mati" # Satu alasan tetap agar statistik alasan gagal tidak pecah per subnet
+
+# --- Mode terdistribusi (coordinator/worker via TCP) ---
+COORDINATOR_FLAG = "--coordinator"
+WORKER_FLAG = "--worker"
+REMOTE_WORKERS_FLAG = "--remote-workers" # Tanpa flag ini coordinator hanya menerima worker dari host sendiri
+DISTRIBUTED_BIND_HOST = "127.0.0.1"
+REMOTE_BIND_HOST = "0.0.0.0"
+WORKER_TOKEN_ENV = "PROXYSYNC_WORKER_TOKEN" # Token bersama; wajib di setiap request worker
+DISTRIBUTED_PORT = 8765
+DISTRIBUTED_DB_FILE = "distributed_queue.db" # Hanya dibuka coordinator
+DISTRIBUTED_WORKER_LOG = "distributed_worker.log"
+LOCAL_WORKER_COUNT = 3 # Worker lokal yang dijalankan coordinator (0 = hanya worker remote)
+SHARD_SIZE = 200
+SHARD_LEASE_SECONDS = 120 # Shard worker yang mati/diam selama ini diambil worker lain
+RESULT_FLUSH_SIZE = 25
+POLL_SECONDS = 1
+MAX_WORKER_RESPAWNS = 3
+
 API_DOWNLOAD_WORKERS = 1
 RETRY_COUNT = 2
 
@@ -73,35 +115,64 @@ def get_current_public_ip():
         ui.console.print(f"   -> [bold green]IP baru: {new_ip}[/bold green]"); return new_ip
     except requests.RequestException as e: ui.console.print(f"   -> [bold red]ERROR Gagal cek IP: {e}[/bold red]", file=sys.stderr); return None
 
-def get_account_email(session: requests.Session) -> str:
+# --- Cache metadata akun Webshare ---
+def get_webshare_cache_key(api_key):
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+def load_webshare_cache(file_path):
+    if not os.path.exists(file_path): return {}
     try:
-        response = session.get(WEBSHARE_PROFILE_URL, timeout=WEBSHARE_API_TIMEOUT)
-        if response.status_code == 401: return "[bold red]API Key Invalid[/]"
-        response.raise_for_status()
-        data = response.json(); email = data.get("email")
-        if email: return email
-        else: return "[yellow]Email N/A[/]"
-    except requests.exceptions.HTTPError as e: return f"[bold red]HTTP Err ({e.response.status_code})[/]"
-    except requests.RequestException: return "[bold red]Koneksi Err[/]"
-    except Exception: return "[bold red]Parsing Err[/]"
-
-def get_target_plan_id(session: requests.Session):
-    ui.console.print("2. Cek Plan ID (via /config/)...")
+        with open(file_path, "r") as f: cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (IOError, json.JSONDecodeError): return {}
+
+def save_webshare_cache(cache, file_path):
     try:
+        with open(file_path, "w") as f: json.dump(cache, f, indent=2)
+    except IOError as e: ui.console.print(f"[yellow]Gagal simpan cache '{file_path}': {e}[/yellow]")
+
+def fetch_account_info(session: requests.Session):
+    """Ambil metadata akun sekali jalan: /profile/ (email) + /config/ (plan ID & token download).
+
+    Entri tanpa email/token download tidak diberi 'fetched', jadi tidak pernah dianggap valid oleh cache.
+    """
+    info = {"email": None}
+    try:
+        response = session.get(WEBSHARE_PROFILE_URL, timeout=WEBSHARE_API_TIMEOUT)
+        if response.status_code == 401: return None, "API Key Invalid"
+        if response.ok: info["email"] = response.json().get("email")
         response = session.get(WEBSHARE_CONFIG_URL, timeout=WEBSHARE_API_TIMEOUT)
-        if response.status_code == 401: ui.console.print("   -> [bold red]ERROR: API Key invalid.[/bold red]"); return None
-        response.raise_for_status()
-        data = response.json(); plan_id = data.get("id")
-        if plan_id: plan_id_str = str(plan_id); ui.console.print(f"   -> [green]OK: Plan ID: {plan_id_str}[/green]"); return plan_id_str
-        else: ui.console.print("   -> [bold red]ERROR: /config/ tidak return 'id'.[/bold red]"); return None
-    except requests.exceptions.HTTPError as e: ui.console.print(f"   -> [bold red]ERROR HTTP: {e.response.text}[/bold red]"); return None
-    except requests.RequestException as e: ui.console.print(f"   -> [bold red]ERROR Koneksi: {e}[/bold red]"); return None
+        if response.status_code == 401: return None, "API Key Invalid"
+        response.raise_for_status(); data = response.json()
+        if not data.get("id"): return None, "/config/ tidak return 'id'"
+        info["plan_id"] = str(data["id"]); info["download_token"] = data.get("proxy_list_download_token")
+        if info["email"] and info["download_token"]: info["fetched"] = time.time()
+        return info, None
+    except requests.exceptions.HTTPError as e: return None, f"HTTP Err ({e.response.status_code})"
+    except requests.RequestException: return None, "Koneksi Err"
+    except ValueError: return None, "Parsing Err"
+
+def get_account_info(session: requests.Session, api_key, cache, current_ip=None):
+    """Metadata akun dari cache (jika masih valid & IP publik sama) atau fetch baru. Return (info, error, dari_cache)."""
+    cache_key = get_webshare_cache_key(api_key); entry = cache.get(cache_key)
+    if entry and time.time() - entry.get("fetched", 0) < WEBSHARE_CACHE_TTL:
+        if current_ip is None or entry.get("public_ip") in (None, current_ip):
+            if current_ip and entry.get("public_ip") is None: entry["public_ip"] = current_ip
+            return entry, None, True
+    info, error = fetch_account_info(session)
+    if info is None: cache.pop(cache_key, None); return None, error, False
+    info["public_ip"] = current_ip; cache[cache_key] = info
+    return info, None, False
+
+def invalidate_account_info(cache, api_key):
+    cache.pop(get_webshare_cache_key(api_key), None)
 
 def get_authorized_ips(session: requests.Session, plan_id: str):
     ui.console.print("3. Cek IP terdaftar...")
     params = {"plan_id": plan_id}; ip_to_id_map = {}
     try:
         response = session.get(WEBSHARE_AUTH_URL, params=params, timeout=WEBSHARE_API_TIMEOUT)
+        if response.status_code == 401: ui.console.print("   -> [bold red]ERROR: API Key invalid.[/bold red]"); return None
         response.raise_for_status(); results = response.json().get("results", [])
         for item in results:
             ip = item.get("ip_address"); auth_id = item.get("id")
@@ -109,7 +180,7 @@ def get_authorized_ips(session: requests.Session, plan_id: str):
         if not ip_to_id_map: ui.console.print("   -> Tidak ada IP lama.")
         else: ui.console.print(f"   -> IP lama: {', '.join(ip_to_id_map.keys())}")
         return ip_to_id_map
-    except requests.RequestException as e: ui.console.print(f"   -> [bold red]ERROR Gagal cek IP lama: {e}[/bold red]"); return {}
+    except requests.RequestException as e: ui.console.print(f"   -> [bold red]ERROR Gagal cek IP lama: {e}[/bold red]"); return None
 
 def remove_ip(session: requests.Session, ip: str, authorization_id: int, plan_id: str):
     ui.console.print(f"   -> Hapus IP lama: {ip} (ID: {authorization_id})")
@@ -133,16 +204,29 @@ def add_ip(session: requests.Session, ip: str, plan_id: str):
     params = {"plan_id": plan_id}; payload = {"ip_address": ip}
     try:
         response = session.post(WEBSHARE_AUTH_URL, json=payload, params=params, timeout=WEBSHARE_API_TIMEOUT)
-        if response.status_code == 201: ui.console.print(f"   -> [green]OK Tambah: {ip}[/green]")
-        else:
-            ui.console.print(f"   -> [bold red]ERROR Gagal tambah {ip} ({response.status_code})[/bold red]")
-            try: ui.console.print(f"      {response.json()}")
-            except: ui.console.print(f"      {response.text}")
-            response.raise_for_status()
+        if response.status_code == 201: ui.console.print(f"   -> [green]OK Tambah: {ip}[/green]"); return True
+        ui.console.print(f"   -> [bold red]ERROR Gagal tambah {ip} ({response.status_code})[/bold red]")
+        try: ui.console.print(f"      {response.json()}")
+        except: ui.console.print(f"      {response.text}")
+        return False
     except requests.RequestException as e:
         ui.console.print(f"   -> [bold red]ERROR Gagal tambah {ip}[/bold red]")
         try: ui.console.print(f"      {e.response.text}")
         except: ui.console.print(f"      {e}")
+        return False
+
+def sync_account_ip(session: requests.Session, plan_id: str, new_ip: str):
+    """Langkah 3-5: ganti IP otorisasi akun dengan new_ip. Return False jika cek/tambah IP gagal."""
+    # IP otorisasi tidak di-cache: bisa diubah host lain/dashboard kapan saja
+    authorized_ips_map = get_authorized_ips(session, plan_id)
+    if authorized_ips_map is None: return False
+    existing_ips = list(authorized_ips_map.keys())
+    if new_ip in existing_ips: ui.console.print(f"   -> [green]IP baru ({new_ip}) sudah ada. Skip.[/green]"); return True
+    ui.console.print("\n4. Hapus IP lama...");
+    if not existing_ips: ui.console.print("   -> Tidak ada IP lama.")
+    else:
+        for ip_to_delete, auth_id_to_delete in authorized_ips_map.items(): remove_ip(session, ip_to_delete, auth_id_to_delete, plan_id)
+    ui.console.print("\n5. Tambah IP baru..."); return add_ip(session, new_ip, plan_id)
 
 def run_webshare_ip_sync():
     ui.print_header()
@@ -152,45 +236,45 @@ def run_webshare_ip_sync():
     new_ip = get_current_public_ip()
     if not new_ip: ui.console.print("[bold red]Gagal IP. Batal.[/bold red]"); return
     ui.console.print(f"\nSinkron IP [bold]{new_ip}[/bold] ke [bold]{len(api_keys)}[/bold] akun...")
+    cache = load_webshare_cache(WEBSHARE_CACHE_FILE)
 
     for api_key in api_keys:
-        account_email_info = "[grey]Cek email...[/]"
-        try:
-            with requests.Session() as email_session:
-                email_session.headers.update({"Authorization": f"Token {api_key}", "Accept": "application/json"})
-                account_email_info = get_account_email(email_session) # Tanpa sensor
-        except Exception: account_email_info = "[bold red]Error[/]"
-        ui.console.print(f"\n--- Key: [...{api_key[-6:]}] (Email: {account_email_info}) ---")
-
         with requests.Session() as session:
             session.headers.update({"Authorization": f"Token {api_key}", "Accept": "application/json"})
             try:
-                plan_id = get_target_plan_id(session)
-                if not plan_id: ui.console.print(f"   -> [bold red]Akun skip.[/bold red]"); continue
-                authorized_ips_map = get_authorized_ips(session, plan_id)
-                existing_ips = list(authorized_ips_map.keys())
-                if new_ip in existing_ips: ui.console.print(f"   -> [green]IP baru ({new_ip}) sudah ada. Skip.[/green]"); continue
-                ui.console.print("\n4. Hapus IP lama...");
-                if not existing_ips: ui.console.print("   -> Tidak ada IP lama.")
-                else:
-                    for ip_to_delete, auth_id_to_delete in authorized_ips_map.items(): remove_ip(session, ip_to_delete, auth_id_to_delete, plan_id)
-                ui.console.print("\n5. Tambah IP baru..."); add_ip(session, new_ip, plan_id)
-            except Exception as e: ui.console.print(f"   -> [bold red]!!! ERROR Hapus/Tambah. Lanjut akun berikutnya.[/bold red]")
+                info, error, from_cache = get_account_info(session, api_key, cache, new_ip)
+                account_email_info = (info.get("email") or "[yellow]Email N/A[/]") if info else f"[bold red]{error}[/]" # Tanpa sensor
+                ui.console.print(f"\n--- Key: [...{api_key[-6:]}] (Email: {account_email_info}) ---")
+                ui.console.print(f"2. Cek Plan ID{' (cache)' if from_cache else ' (via /config/)'}...")
+                if not info: ui.console.print(f"   -> [bold red]ERROR: {error}. Akun skip.[/bold red]"); continue
+                ui.console.print(f"   -> [green]OK: Plan ID: {info['plan_id']}[/green]")
+                if sync_account_ip(session, info["plan_id"], new_ip): continue
+                invalidate_account_info(cache, api_key)
+                if not from_cache: ui.console.print(f"   -> [bold red]Akun skip.[/bold red]"); continue
+                # Plan ID dari cache mungkin sudah basi: ambil /config/ ulang, coba sekali lagi
+                ui.console.print("\n[yellow]Gagal dengan data cache, ambil ulang via /config/...[/yellow]")
+                info, error, _ = get_account_info(session, api_key, cache, new_ip)
+                if not info: ui.console.print(f"   -> [bold red]ERROR: {error}. Akun skip.[/bold red]"); continue
+                ui.console.print(f"   -> [green]OK: Plan ID: {info['plan_id']}[/green]")
+                if not sync_account_ip(session, info["plan_id"], new_ip): invalidate_account_info(cache, api_key); ui.console.print(f"   -> [bold red]Akun skip.[/bold red]")
+            except Exception as e: invalidate_account_info(cache, api_key); ui.console.print(f"   -> [bold red]!!! ERROR Hapus/Tambah. Lanjut akun berikutnya.[/bold red]")
+    save_webshare_cache(cache, WEBSHARE_CACHE_FILE)
     ui.console.print("\n[bold green]✅ Sinkronisasi IP selesai.[/bold green]")
 
-def get_webshare_download_url(session: requests.Session, plan_id: str):
-    ui.console.print("   -> Get URL download (via /config/)...")
-    params = {"plan_id": plan_id}
-    try:
-        response = session.get(WEBSHARE_CONFIG_URL, params=params, timeout=WEBSHARE_API_TIMEOUT)
-        response.raise_for_status()
-        data = response.json(); token = data.get("proxy_list_download_token")
-        if not token: ui.console.print("   -> [bold red]ERROR: 'proxy_list_download_token' N/A.[/bold red]"); return None
-        # Format URL pakai 'username' literal
-        download_url = WEBSHARE_DOWNLOAD_URL_FORMAT.format(token=token, plan_id=plan_id)
-        ui.console.print(f"   -> [green]OK URL download.[/green]"); return download_url
-    except requests.exceptions.HTTPError as e: ui.console.print(f"   -> [bold red]ERROR Config: {e.response.text}[/bold red]"); return None
-    except requests.RequestException as e: ui.console.print(f"   -> [bold red]ERROR Koneksi (config): {e}[/bold red]"); return None
+def get_webshare_download_target(api_key, cache):
+    """URL download proxy list satu akun (metadata dari cache jika valid). Return (url, dari_cache)."""
+    with requests.Session() as session:
+        session.headers.update({"Authorization": f"Token {api_key}", "Accept": "application/json"})
+        try:
+            info, error, from_cache = get_account_info(session, api_key, cache)
+            account_email_info = (info.get("email") or "[yellow]Email N/A[/]") if info else f"[bold red]{error}[/]" # Tanpa sensor
+            ui.console.print(f"\n--- Key: [...{api_key[-6:]}] (Email: {account_email_info}) ---")
+            if not info: ui.console.print(f"   -> [bold red]ERROR: {error}. Akun skip.[/bold red]"); return None, False
+            plan_id = info["plan_id"]; token = info.get("download_token")
+            ui.console.print(f"   -> [green]OK: Plan ID: {plan_id}{' (cache)' if from_cache else ''}[/green]")
+            if not token: ui.console.print("   -> [bold red]ERROR: 'proxy_list_download_token' N/A. Skip.[/bold red]"); return None, False
+            return WEBSHARE_DOWNLOAD_URL_FORMAT.format(token=token, plan_id=plan_id), from_cache # Format URL pakai 'username' literal
+        except Exception as e: ui.console.print(f"   -> [bold red]!!! FATAL: {e}[/bold red]"); return None, False
 
 def download_proxies_from_api():
     ui.print_header()
@@ -208,24 +292,12 @@ def download_proxies_from_api():
     api_keys = load_webshare_apikeys(WEBSHARE_APIKEYS_FILE)
     if not api_keys: ui.console.print(f"[yellow]'{WEBSHARE_APIKEYS_FILE}' kosong.[/yellow]")
 
+    cache = load_webshare_cache(WEBSHARE_CACHE_FILE); cached_keys = set()
     for api_key in api_keys:
-        account_email_info = "[grey]Cek email...[/]"
-        try:
-            with requests.Session() as email_session:
-                email_session.headers.update({"Authorization": f"Token {api_key}", "Accept": "application/json"})
-                account_email_info = get_account_email(email_session) # Tanpa sensor
-        except Exception: account_email_info = "[bold red]Error[/]"
-        ui.console.print(f"\n--- Key: [...{api_key[-6:]}] (Email: {account_email_info}) ---")
-
-        with requests.Session() as session:
-            session.headers.update({"Authorization": f"Token {api_key}", "Accept": "application/json"})
-            try:
-                plan_id = get_target_plan_id(session)
-                if not plan_id: ui.console.print(f"   -> [bold red]Akun skip.[/bold red]"); continue
-                download_url = get_webshare_download_url(session, plan_id)
-                if download_url: all_download_targets.append((download_url, api_key))
-                else: ui.console.print("   -> [yellow]Gagal URL. Skip.[/yellow]")
-            except Exception as e: ui.console.print(f"   -> [bold red]!!! FATAL: {e}[/bold red]")
+        download_url, from_cache = get_webshare_download_target(api_key, cache)
+        if not download_url: continue
+        all_download_targets.append((download_url, api_key))
+        if from_cache: cached_keys.add(api_key)
 
     ui.console.print(f"\n[bold]Load URL manual '{APILIST_SOURCE_FILE}'...[/bold]")
     manual_urls = load_apis(APILIST_SOURCE_FILE)
@@ -233,9 +305,20 @@ def download_proxies_from_api():
     else:
         ui.console.print(f"[green]{len(manual_urls)} URL manual.[/green]"); all_download_targets.extend([(url, None) for url in manual_urls])
 
-    if not all_download_targets: ui.console.print("\n[bold red]Tidak ada URL API.[/bold red]"); return
+    if not all_download_targets: save_webshare_cache(cache, WEBSHARE_CACHE_FILE); ui.console.print("\n[bold red]Tidak ada URL API.[/bold red]"); return
     ui.console.print(f"\n[bold cyan]Siap unduh dari {len(all_download_targets)} URL...[/bold cyan]")
-    all_downloaded_proxies = ui.run_sequential_api_downloads(all_download_targets)
+    failed_keys = []
+    all_downloaded_proxies = ui.run_sequential_api_downloads(all_download_targets, on_error=lambda url, api_key, error: failed_keys.append(api_key))
+    retry_keys = [api_key for api_key in failed_keys if api_key in cached_keys]
+    if retry_keys: # Token dari cache mungkin sudah di-reset: buang cache, ambil /config/ ulang, coba sekali lagi
+        ui.console.print(f"[yellow]{len(retry_keys)} unduhan dengan token cache gagal, refresh token...[/yellow]")
+        retry_targets = []
+        for api_key in retry_keys:
+            invalidate_account_info(cache, api_key)
+            download_url, _ = get_webshare_download_target(api_key, cache)
+            if download_url: retry_targets.append((download_url, api_key))
+        if retry_targets: all_downloaded_proxies.extend(ui.run_sequential_api_downloads(retry_targets))
+    save_webshare_cache(cache, WEBSHARE_CACHE_FILE)
     if not all_downloaded_proxies: ui.console.print("\n[bold yellow]Tidak ada proksi diunduh.[/bold yellow]"); return
     try:
         with open(PROXYLIST_SOURCE_FILE, "w") as f:
@@ -407,6 +490,296 @@ def check_proxy_final(proxy):
     except requests.exceptions.ProxyError as e: reason = str(e).split(':')[-1].strip(); return proxy, False, f"Proxy Error ({reason[:30]})"
     except requests.exceptions.RequestException as e: reason = str(e.__class__.__name__); return proxy, False, f"Koneksi Gagal ({reason})"
 
+# --- Journal hasil tes (resume) ---
+def compute_run_id(proxies):
+    """ID run dari daftar proksi unik (sudah di-sort oleh dedup)."""
+    return hashlib.sha1("\n".join(proxies).encode("utf-8")).hexdigest()[:16]
+
+def load_check_journal(file_path, run_id):
+    """Baca hasil tes yang sudah tercatat untuk run_id ini. Baris rusak (crash saat tulis) diabaikan."""
+    if not os.path.exists(file_path): return {}
+    results = {}
+    try:
+        with open(file_path, "r") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("run_id") != run_id: return {}
+            for line in f:
+                try: entry = json.loads(line)
+                except json.JSONDecodeError: continue
+                if "proxy" in entry: results[entry["proxy"]] = (bool(entry.get("ok")), entry.get("reason", ""))
+    except (IOError, json.JSONDecodeError) as e: ui.console.print(f"[yellow]Journal '{file_path}' tidak terbaca: {e}[/yellow]"); return {}
+    return results
+
+def open_check_journal(file_path, run_id, resume):
+    """Buka journal untuk append (resume) atau mulai baru dengan header run_id."""
+    if resume:
+        journal = open(file_path, "a+"); journal.seek(0, os.SEEK_END)
+        if journal.tell() > 0:
+            journal.seek(journal.tell() - 1); last_char = journal.read(1)
+            if last_char != "\n": journal.write("\n") # Tutup baris terpotong dari run yang crash
+        return journal
+    journal = open(file_path, "w")
+    journal.write(json.dumps({"run_id": run_id, "started": int(time.time())}) + "\n"); journal.flush()
+    return journal
+
+def make_journal_writer(journal):
+    def write_result(proxy, is_good, message):
+        journal.write(json.dumps({"proxy": proxy, "ok": is_good, "reason": message}) + "\n"); journal.flush()
+    return write_result
+
+# --- Cluster subnet ---
+def get_cluster_key(proxy):
+    """Kunci cluster: prefix /24 (IPv4) atau /48 (IPv6) sebagai int; host non-IP per host:port."""
+    try: parts = urlsplit(proxy if "://" in proxy else f"http://{proxy}"); host = parts.hostname or proxy; port = parts.port
+    except ValueError: return proxy
+    try: ip = ipaddress.ip_address(host)
+    except ValueError: return f"{host}:{port}"
+    return (4, int(ip) >> 8) if ip.version == 4 else (6, int(ip) >> 80)
+
+def format_cluster_key(key):
+    if isinstance(key, str): return key
+    version, prefix = key
+    if version == 4: return f"{ipaddress.IPv4Address(prefix << 8)}/24"
+    return f"{ipaddress.IPv6Address(prefix << 80)}/48"
+
+def count_proxy_clusters(proxies):
+    cluster_sizes = {}
+    for proxy in proxies:
+        key = get_cluster_key(proxy); cluster_sizes[key] = cluster_sizes.get(key, 0) + 1
+    return cluster_sizes
+
+def build_proxy_clusters(proxies):
+    clusters = {}
+    for proxy in proxies: clusters.setdefault(get_cluster_key(proxy), []).append(proxy)
+    return clusters
+
+def spread_by_cluster(proxies):
+    """Acak urutan proksi, tapi sebar anggota satu subnet merata di sepanjang list."""
+    keyed = []
+    for members in build_proxy_clusters(proxies).values():
+        shuffled = random.sample(members, len(members)); offset = random.random()
+        keyed.extend(((i + offset) / len(shuffled), random.random(), p) for i, p in enumerate(shuffled))
+    keyed.sort()
+    return [p for _, _, p in keyed]
+
+def is_cluster_down_reason(message):
+    """Gagal jaringan yang menandakan subnet mati; 407 (mis. saat HTTPS CONNECT) adalah gagal kredensial."""
+    return message.startswith(CLUSTER_DOWN_REASONS) and "407" not in message
+
+class ClusterGate:
+    """Tes sampel tiap cluster besar dulu; jika semua sampel gagal jaringan, sisa cluster dilewati."""
+
+    def __init__(self, check_function, proxies):
+        # Index ringkas: state per prefix + set sampel saja; kunci anggota dihitung ulang saat dites
+        self.check_function = check_function
+        cluster_sizes = count_proxy_clusters(proxies); self.cluster_count = len(cluster_sizes)
+        self.remaining = {key: CLUSTER_SAMPLE_SIZE for key, size in cluster_sizes.items() if size >= CLUSTER_MIN_SIZE}
+        self.alive = dict.fromkeys(self.remaining, False); self.decided = {key: threading.Event() for key in self.remaining}
+        self.samples = set(); sample_counts = {}
+        for proxy in proxies: # N proksi pertama per prefix (list sudah di-sort), deterministik agar konsisten saat resume
+            key = get_cluster_key(proxy)
+            if key in self.remaining and sample_counts.get(key, 0) < CLUSTER_SAMPLE_SIZE:
+                self.samples.add(proxy); sample_counts[key] = sample_counts.get(key, 0) + 1
+        self.lock = threading.Lock(); self.skipped = 0
+
+    def order(self, proxies):
+        """Sampel di depan antrean, agar sudah jalan sebelum anggota cluster menunggu hasilnya."""
+        yield from (p for p in proxies if p in self.samples)
+        yield from (p for p in proxies if p not in self.samples)
+
+    def record(self, proxy, is_good, message):
+        if proxy not in self.samples: return
+        key = get_cluster_key(proxy)
+        with self.lock:
+            if self.decided[key].is_set(): return
+            self.remaining[key] -= 1
+            if is_good or not is_cluster_down_reason(message): self.alive[key] = True
+            if self.alive[key] or self.remaining[key] <= 0: self.decided[key].set()
+
+    def check(self, proxy):
+        key = None if proxy in self.samples else get_cluster_key(proxy)
+        if key in self.decided:
+            self.decided[key].wait()
+            if not self.alive[key]:
+                with self.lock: self.skipped += 1
+                return proxy, False, CLUSTER_DOWN_MESSAGE
+            return self.check_function(proxy)
+        if key is not None: return self.check_function(proxy)
+        result = None
+        try:
+            result = self.check_function(proxy); return result
+        finally:
+            if result is None: self.record(proxy, True, "") # Error tak terduga: anggap cluster hidup, jangan blokir anggotanya
+            else: self.record(*result)
+
+    def summary(self):
+        return len(self.decided), len(self.samples), sum(1 for key in self.decided if not self.alive[key])
+
+# --- Mode terdistribusi ---
+# Hanya coordinator yang membuka file SQLite (disk lokal); worker lokal/remote bicara lewat TCP,
+# satu request/balasan JSON per baris: {"op": "claim"} dan {"op": "submit"}.
+def open_queue_db(db_path):
+    conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS shards (id INTEGER PRIMARY KEY, proxies TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', worker TEXT, lease_until REAL NOT NULL DEFAULT 0);
+        CREATE TABLE IF NOT EXISTS results (id INTEGER PRIMARY KEY AUTOINCREMENT, shard_id INTEGER NOT NULL, proxy TEXT NOT NULL UNIQUE, ok INTEGER NOT NULL, reason TEXT);
+    """)
+    return conn
+
+def remove_queue_db(db_path):
+    for suffix in ("", "-journal"):
+        try: os.remove(db_path + suffix)
+        except OSError: pass
+
+def create_shard_queue(db_path, proxies):
+    remove_queue_db(db_path)
+    conn = open_queue_db(db_path)
+    with conn:
+        conn.executemany("INSERT INTO shards (proxies) VALUES (?)", (("\n".join(proxies[i:i + SHARD_SIZE]),) for i in range(0, len(proxies), SHARD_SIZE)))
+    return conn
+
+def claim_shard(conn, worker_id):
+    """Ambil satu shard pending (atau yang lease-nya habis) secara atomik."""
+    now = time.time()
+    with conn:
+        conn.execute("UPDATE shards SET status = 'leased', worker = ?, lease_until = ? WHERE id = (SELECT id FROM shards WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?) ORDER BY id LIMIT 1)", (worker_id, now + SHARD_LEASE_SECONDS, now))
+    return conn.execute("SELECT id, proxies FROM shards WHERE status = 'leased' AND worker = ?", (worker_id,)).fetchone()
+
+def submit_shard_results(conn, shard_id, worker_id, results, finished=False):
+    """Simpan hasil dan perpanjang lease. Ditolak (False) jika shard tidak di-lease ke worker ini;
+    proksi di luar shard diabaikan, duplikat dari shard yang diambil ulang juga."""
+    shard = conn.execute("SELECT proxies, status, worker FROM shards WHERE id = ?", (shard_id,)).fetchone()
+    if not shard or shard[1] != "leased" or shard[2] != worker_id: return False
+    shard_proxies = set(shard[0].split("\n"))
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO results (shard_id, proxy, ok, reason) VALUES (?, ?, ?, ?)", ((shard_id, p, int(ok), reason) for p, ok, reason in results if p in shard_proxies))
+        if finished: conn.execute("UPDATE shards SET status = 'done' WHERE id = ? AND worker = ?", (shard_id, worker_id))
+        else: conn.execute("UPDATE shards SET lease_until = ? WHERE id = ? AND worker = ?", (time.time() + SHARD_LEASE_SECONDS, shard_id, worker_id))
+    return True
+
+def is_queue_finished(conn):
+    return conn.execute("SELECT COUNT(*) FROM shards WHERE status != 'done'").fetchone()[0] == 0
+
+class ShardRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try: request = json.loads(line)
+            except json.JSONDecodeError: break
+            reply = self.server.handle_queue_request(request)
+            self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+
+class ShardQueueServer(socketserver.ThreadingTCPServer):
+    """Coordinator TCP: bagikan shard ke worker dan terima hasilnya ke queue SQLite lokal."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, conn, token):
+        super().__init__(address, ShardRequestHandler)
+        self.conn = conn; self.token = token; self.lock = threading.Lock(); self.closed = False
+
+    def handle_queue_request(self, request):
+        if not hmac.compare_digest(str(request.get("token", "")), self.token): return {"error": "token worker invalid"}
+        with self.lock:
+            op = request.get("op"); worker_id = str(request.get("worker"))
+            if op == "claim":
+                if self.closed or is_queue_finished(self.conn): return {"finished": True}
+                shard = claim_shard(self.conn, worker_id)
+                if shard is None: return {"shard_id": None}
+                shard_id, shard_proxies = shard
+                done = {row[0] for row in self.conn.execute("SELECT proxy FROM results WHERE shard_id = ?", (shard_id,))}
+                return {"shard_id": shard_id, "proxies": [p for p in shard_proxies.split("\n") if p not in done]}
+            if op == "submit":
+                try: results = [(str(p), bool(ok), str(reason)) for p, ok, reason in request.get("results", [])]
+                except (TypeError, ValueError): return {"error": "format hasil invalid"}
+                return {"ok": submit_shard_results(self.conn, request.get("shard_id"), worker_id, results, bool(request.get("finished")))}
+        return {"error": f"op tidak dikenal: {op}"}
+
+    def read_results(self, after_id):
+        with self.lock:
+            return self.conn.execute("SELECT id, proxy, ok, reason FROM results WHERE id > ? ORDER BY id", (after_id,)).fetchall()
+
+def parse_coordinator_address(address):
+    host, _, port = address.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+def run_distributed_worker(address, check_function=None):
+    """Worker: ambil shard dari coordinator, tes dengan check_function (default check_proxy_final), kirim hasil balik."""
+    if check_function is None:
+        if not load_github_token(GITHUB_TOKENS_FILE): ui.console.print("[bold red]Worker batal (token GitHub?).[/bold red]"); return
+        check_function = check_proxy_final
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"; token = os.environ.get(WORKER_TOKEN_ENV, "")
+    if not token: ui.console.print(f"[bold red]Worker batal: env {WORKER_TOKEN_ENV} kosong.[/bold red]"); return
+    try:
+        with socket.create_connection(parse_coordinator_address(address), timeout=60) as sock, sock.makefile("rw", encoding="utf-8") as stream:
+            def call(request):
+                request["worker"] = worker_id; request["token"] = token
+                stream.write(json.dumps(request) + "\n"); stream.flush()
+                reply = stream.readline()
+                if not reply: raise ConnectionError("coordinator menutup koneksi")
+                reply = json.loads(reply)
+                if reply.get("error"): raise ValueError(reply["error"])
+                return reply
+            ui.console.print(f"[cyan]Worker {worker_id} terhubung ke {address}.[/cyan]")
+            while True:
+                shard = call({"op": "claim"})
+                if shard.get("finished"): break
+                if shard.get("shard_id") is None: time.sleep(POLL_SECONDS); continue
+                shard_id = shard["shard_id"]; ui.console.print(f"  Shard #{shard_id}: {len(shard['proxies'])} proksi")
+                batch = []; lease_kept = True
+                with closing(ui.iter_concurrent_results(shard["proxies"], check_function, MAX_WORKERS)) as results:
+                    for result in results:
+                        batch.append(result)
+                        if len(batch) >= RESULT_FLUSH_SIZE:
+                            lease_kept = call({"op": "submit", "shard_id": shard_id, "results": batch})["ok"]; batch = []
+                            if not lease_kept: break
+                if lease_kept: lease_kept = call({"op": "submit", "shard_id": shard_id, "results": batch, "finished": True})["ok"]
+                if not lease_kept: ui.console.print(f"  [yellow]Shard #{shard_id} sudah diambil worker lain, lanjut.[/yellow]")
+    except (OSError, ValueError) as e: ui.console.print(f"[bold red]Worker {worker_id} berhenti: {e}[/bold red]"); return
+    ui.console.print(f"[green]Worker {worker_id} selesai.[/green]")
+
+def iter_distributed_results(proxies, db_path=DISTRIBUTED_DB_FILE, local_workers=LOCAL_WORKER_COUNT, port=DISTRIBUTED_PORT, bind_host=None, worker_command=None):
+    """Coordinator: bagi proksi jadi shard, layani worker lewat TCP, yield hasil dari semua worker.
+
+    `worker_command` mengganti perintah worker lokal (alamat coordinator ditambahkan di akhir).
+    """
+    proxies = list(proxies); db_path = os.path.abspath(db_path)
+    if bind_host is None: bind_host = REMOTE_BIND_HOST if REMOTE_WORKERS_FLAG in sys.argv else DISTRIBUTED_BIND_HOST
+    if worker_command is None: worker_command = [sys.executable, os.path.abspath(__file__), WORKER_FLAG]
+    token = os.environ.get(WORKER_TOKEN_ENV) or secrets.token_hex(16)
+    server = conn = log_file = None; workers = []; serving = False
+    try:
+        # Bind dulu: jika port terpakai, queue belum dibuat dan run dilaporkan terputus (journal tetap ada)
+        try: server = ShardQueueServer((bind_host, port), None, token)
+        except OSError as e: raise RuntimeError(f"Coordinator gagal listen di {bind_host}:{port} ({e})")
+        conn = server.conn = create_shard_queue(db_path, proxies)
+        threading.Thread(target=server.serve_forever, daemon=True).start(); serving = True
+        ui.console.print(f"[dim]Coordinator di {bind_host}:{server.server_address[1]}[/dim]")
+        if bind_host != DISTRIBUTED_BIND_HOST: ui.console.print(f"[dim]Worker remote: {WORKER_TOKEN_ENV}={token} python main.py {WORKER_FLAG} <host>:{server.server_address[1]}[/dim]")
+        log_file = open(DISTRIBUTED_WORKER_LOG, "a") if local_workers else None
+        worker_address = f"127.0.0.1:{server.server_address[1]}"; worker_env = dict(os.environ, **{WORKER_TOKEN_ENV: token})
+        spawn_workers = lambda: [subprocess.Popen(worker_command + [worker_address], stdout=log_file, stderr=subprocess.STDOUT, env=worker_env) for _ in range(local_workers)]
+        workers = spawn_workers(); respawns = 0; last_id = 0; received = 0
+        while received < len(proxies):
+            rows = server.read_results(last_id)
+            for row_id, proxy, ok, reason in rows:
+                last_id = row_id; received += 1
+                yield proxy, bool(ok), reason
+            if rows: continue
+            if workers and all(w.poll() is not None for w in workers):
+                if respawns >= MAX_WORKER_RESPAWNS: raise RuntimeError(f"Worker lokal terus berhenti ({received}/{len(proxies)} hasil), cek '{DISTRIBUTED_WORKER_LOG}'")
+                workers = spawn_workers(); respawns += 1
+            time.sleep(POLL_SECONDS)
+    finally:
+        if server: server.closed = True # Claim berikutnya dibalas "finished"
+        for w in workers:
+            try: w.wait(timeout=PROXY_TIMEOUT + 5)
+            except subprocess.TimeoutExpired: w.terminate()
+        if serving: server.shutdown()
+        if server: server.server_close()
+        if conn: conn.close()
+        if log_file: log_file.close()
+        if server: remove_queue_db(db_path) # Hanya queue milik coordinator ini
+
 def distribute_proxies(proxies, paths):
     if not proxies or not paths: ui.console.print("[yellow]Distribusi skip (no data).[/yellow]"); return
     ui.console.print(f"\n[cyan]Distribusi {len(proxies)} proksi ke {len(paths)} path...[/cyan]")
@@ -416,20 +789,13 @@ def distribute_proxies(proxies, paths):
         file_name = "proxies.txt"; file_path = os.path.join(path, file_name)
         if not os.path.exists(file_path): file_name = "proxy.txt"; file_path = os.path.join(path, file_name)
         rel_path_display = os.path.relpath(file_path, project_root_abs)
-        proxies_shuffled = random.sample(proxies, len(proxies))
+        proxies_shuffled = spread_by_cluster(proxies)
         try:
             with open(file_path, "w") as f:
                 for proxy in proxies_shuffled: f.write(proxy + "\n")
             ui.console.print(f"  [green]✔[/green] Tulis ke [bold]{rel_path_display}[/bold]")
         except IOError as e: ui.console.print(f"  [red]✖[/red] Gagal tulis [bold]{rel_path_display}[/bold]: {e}")
 
-def save_good_proxies(proxies, file_path):
-    try:
-        with open(file_path, "w") as f:
-            for proxy in proxies: f.write(proxy + "\n")
-        ui.console.print(f"\n[bold green]✅ {len(proxies)} proksi valid simpan ke '{file_path}'[/bold green]")
-    except IOError as e: ui.console.print(f"\n[bold red]✖ Gagal simpan '{file_path}': {e}[/bold red]")
-
 def run_full_process():
     ui.print_header()
     if not load_github_token(GITHUB_TOKENS_FILE): ui.console.print("[bold red]Tes proxy batal (token GitHub?).[/bold red]"); return
@@ -439,20 +805,44 @@ def run_full_process():
     proxies = load_and_deduplicate_proxies(PROXY_SOURCE_FILE)
     if not proxies: ui.console.print("[bold red]Stop: 'proxy.txt' kosong.[/bold red]"); return
     ui.console.print(f"Siap tes {len(proxies)} proksi unik."); ui.console.print("-" * 40)
+    run_id = compute_run_id(proxies); resumed_results = load_check_journal(CHECK_JOURNAL_FILE, run_id)
+    if resumed_results:
+        resume_choice = "y" if RESUME_FLAG in sys.argv else ui.Prompt.ask(f"[bold yellow]{len(resumed_results)} proksi sudah dites di run sebelumnya. Lanjutkan?[/bold yellow]", choices=["y", "n"], default="y").lower()
+        if resume_choice != "y": resumed_results = {}
+    if COORDINATOR_FLAG in sys.argv: # Mode coordinator: tanpa sampling cluster
+        gate = None; ordered_proxies, check_function, run_checks = proxies, check_proxy_final, iter_distributed_results
+    else:
+        gate = ClusterGate(check_proxy_final, proxies)
+        for proxy, (is_good, message) in resumed_results.items(): gate.record(proxy, is_good, message)
+        sampled_clusters, sample_count, _ = gate.summary()
+        ui.console.print(f"[dim]{gate.cluster_count} cluster subnet, {sampled_clusters} dites via {sample_count} sampel dulu.[/dim]")
+        ordered_proxies, check_function, run_checks = gate.order(proxies), gate.check, None
     ui.console.print("[bold cyan]Langkah 2: Tes Akurat GitHub...[/bold cyan]")
-    good_proxies = ui.run_concurrent_checks_display(proxies, check_proxy_final, MAX_WORKERS, FAIL_PROXY_FILE)
+    try:
+        with open_check_journal(CHECK_JOURNAL_FILE, run_id, bool(resumed_results)) as journal:
+            good_proxies = ui.run_concurrent_checks_display(ordered_proxies, check_function, MAX_WORKERS, FAIL_PROXY_FILE, good_file=SUCCESS_PROXY_FILE, on_result=make_journal_writer(journal), resumed_results=resumed_results, total=len(proxies), run_checks=run_checks)
+    except RuntimeError as e: # Run belum lengkap: journal tetap disimpan untuk resume
+        ui.console.print(f"\n[bold red]Tes terputus: {e}.[/bold red]\n[yellow]Journal '{CHECK_JOURNAL_FILE}' disimpan, jalankan lagi untuk melanjutkan.[/yellow]"); return
+    if gate:
+        _, _, dead_clusters = gate.summary()
+        if dead_clusters: ui.console.print(f"[yellow]{dead_clusters} cluster mati, {gate.skipped} proksi dilewati tanpa tes.[/yellow]")
+    try: os.remove(CHECK_JOURNAL_FILE) # Run selesai, journal tidak dibutuhkan lagi
+    except OSError: pass
     if not good_proxies: ui.console.print("[bold red]Stop: Tidak ada proksi lolos.[/bold red]"); return
     ui.console.print(f"[bold green]{len(good_proxies)} proksi lolos.[/bold green]"); ui.console.print("-" * 40)
     if distribute_choice == 'y':
         ui.console.print("[bold cyan]Langkah 3: Distribusi...[/bold cyan]")
         paths = load_paths(PATHS_SOURCE_FILE)
         if not paths: ui.console.print("[bold red]Stop: 'paths.txt' kosong/invalid.[/bold red]"); return
-        distribute_proxies(good_proxies, paths); save_good_proxies(good_proxies, SUCCESS_PROXY_FILE)
-    else: ui.console.print("[bold cyan]Langkah 3: Simpan proksi valid...[/bold cyan]"); save_good_proxies(good_proxies, SUCCESS_PROXY_FILE)
+        distribute_proxies(good_proxies, paths)
+    ui.console.print(f"\n[bold green]✅ {len(good_proxies)} proksi valid tersimpan di '{SUCCESS_PROXY_FILE}'[/bold green]")
     ui.console.print("\n[bold green]✅ Semua selesai![/bold green]")
 
 def main():
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    if WORKER_FLAG in sys.argv:
+        flag_index = sys.argv.index(WORKER_FLAG)
+        run_distributed_worker(sys.argv[flag_index + 1] if len(sys.argv) > flag_index + 1 else f"127.0.0.1:{DISTRIBUTED_PORT}"); return
     while True:
         ui.print_header(); choice = ui.display_main_menu()
         if choice == "1": run_webshare_ip_sync(); ui.Prompt.ask("\n[bold]Tekan Enter...[/bold]")
@@ -1,8 +1,10 @@
 print("DEBUG: Starting ui.py execution", flush=True)
+import os
 import time
 import requests
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import closing, nullcontext
 from rich.align import Align
 from rich.console import Console
 from rich.panel import Panel
@@ -149,8 +151,11 @@ def fetch_from_api(url: str, api_key: str | None):
                 time.sleep(5) 
     return url, [], error_message
 
-def run_sequential_api_downloads(download_targets: list[tuple[str, str | None]]):
-    """Menjalankan unduhan API satu per satu dengan progress tracking."""
+def run_sequential_api_downloads(download_targets: list[tuple[str, str | None]], on_error=None):
+    """Menjalankan unduhan API satu per satu dengan progress tracking.
+
+    `on_error(url, api_key, error)` dipanggil untuk setiap unduhan yang gagal.
+    """
     all_proxies = []
     
     progress = Progress(
@@ -180,6 +185,8 @@ def run_sequential_api_downloads(download_targets: list[tuple[str, str | None]])
             if error:
                 error_msg = str(error)[:40]
                 console.print(f"[red]FAIL[/red] {url_display} - {error_msg}")
+                if on_error:
+                    on_error(url, api_key, error)
             else:
                 console.print(f"[green]OK[/green]   {url_display} - {len(proxies)} proxies")
                 all_proxies.extend(proxies)
@@ -192,11 +199,65 @@ def run_sequential_api_downloads(download_targets: list[tuple[str, str | None]])
     console.print()
     return all_proxies
 
-def run_concurrent_checks_display(proxies, check_function, max_workers, fail_file):
-    """Menampilkan progress bar untuk testing proxy."""
-    good_proxies, failed_proxies_with_reason = [], []
+SUBMIT_WINDOW_FACTOR = 4 # Maks future in-flight = max_workers * faktor ini
+REASON_STATS_LIMIT = 500 # Maks jenis alasan gagal yang dihitung terpisah
+PARTIAL_SUFFIX = ".partial" # Hasil ditulis ke file sementara, baru menggantikan file asli saat run selesai
+
+def iter_concurrent_results(proxies, check_function, max_workers):
+    """Jalankan check_function dengan jendela submit terbatas, yield hasil sesuai urutan selesai."""
+    proxy_iter = iter(proxies)
+    window = max_workers * SUBMIT_WINDOW_FACTOR
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = set()
+        try:
+            while True:
+                for proxy in proxy_iter:
+                    in_flight.add(executor.submit(check_function, proxy))
+                    if len(in_flight) >= window:
+                        break
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        except (KeyboardInterrupt, GeneratorExit):
+            # Jangan tunggu antrean sisa; hasil yang sudah ada aman di journal
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+def run_concurrent_checks_display(proxies, check_function, max_workers, fail_file, good_file=None, on_result=None, resumed_results=None, total=None, run_checks=None):
+    """Menampilkan progress bar untuk testing proxy.
+
+    Hasil langsung ditulis ke `fail_file` / `good_file` versi `.partial` (diganti ke file
+    asli hanya jika run selesai), alasan gagal hanya disimpan sebagai hitungan. `on_result(proxy, is_good, message)` dipanggil untuk setiap hasil
+    baru (journal), `resumed_results` berisi {proxy: (is_good, message)} dari run yang terputus.
+    `run_checks(proxies)` menggantikan thread pool lokal (mis. mode coordinator).
+    """
+    good_proxies = []
+    success_count = fail_count = 0
+    reason_counts, reason_examples = {}, {}
+    resumed_results = resumed_results or {}
+    total = len(proxies) if total is None else total
+    
+    def record(proxy, is_good, message):
+        nonlocal success_count, fail_count
+        if is_good:
+            success_count += 1
+            good_proxies.append(proxy)
+            if good_out:
+                good_out.write(proxy + "\n")
+            return
+        fail_count += 1
+        fail_out.write(proxy + "\n")
+        if message not in reason_counts and len(reason_counts) >= REASON_STATS_LIMIT:
+            message = "Lainnya"
+        reason_counts[message] = reason_counts.get(message, 0) + 1
+        reason_examples.setdefault(message, proxy)
     
-    console.print(f"[cyan]Memulai testing {len(proxies)} proxies[/cyan]")
+    console.print(f"[cyan]Memulai testing {total} proxies[/cyan]")
+    if resumed_results:
+        console.print(f"[cyan]Resume: {len(resumed_results)} sudah dites, sisa {total - len(resumed_results)}[/cyan]")
     console.print(f"[dim]Workers: {max_workers} threads | Timeout: 25s per proxy[/dim]\n")
     
     progress = Progress(
@@ -211,21 +272,32 @@ def run_concurrent_checks_display(proxies, check_function, max_workers, fail_fil
         console=console
     )
     
-    with Live(progress, console=console, refresh_per_second=10):
-        task = progress.add_task("[cyan]Testing proxies via GitHub API...", total=len(proxies))
+    fail_partial = fail_file + PARTIAL_SUFFIX
+    good_partial = good_file + PARTIAL_SUFFIX if good_file else None
+    with open(fail_partial, "w") as fail_out, (open(good_partial, "w") if good_partial else nullcontext()) as good_out:
+        for proxy, (is_good, message) in resumed_results.items():
+            record(proxy, is_good, message)
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_proxy = {executor.submit(check_function, p): p for p in proxies}
+        with Live(progress, console=console, refresh_per_second=10):
+            task = progress.add_task("[cyan]Testing proxies via GitHub API...", total=total, completed=len(resumed_results))
+            pending_proxies = (p for p in proxies if p not in resumed_results)
+            if run_checks:
+                results = run_checks(pending_proxies)
+            else:
+                results = iter_concurrent_results(pending_proxies, check_function, max_workers)
             
-            for future in as_completed(future_to_proxy):
-                proxy, is_good, message = future.result()
-                
-                if is_good:
-                    good_proxies.append(proxy)
-                else:
-                    failed_proxies_with_reason.append((proxy, message))
-                
-                progress.update(task, advance=1)
+            with closing(results):
+                for proxy, is_good, message in results:
+                    record(proxy, is_good, message)
+                    if on_result:
+                        on_result(proxy, is_good, message)
+                    
+                    progress.update(task, advance=1)
+    
+    # Run lengkap: baru sekarang file hasil lama diganti
+    os.replace(fail_partial, fail_file)
+    if good_partial:
+        os.replace(good_partial, good_file)
     
     console.print()
     
@@ -235,9 +307,6 @@ def run_concurrent_checks_display(proxies, check_function, max_workers, fail_fil
     summary_table.add_column("Count", justify="center", width=10)
     summary_table.add_column("Percentage", justify="center", width=15)
     
-    total = len(proxies)
-    success_count = len(good_proxies)
-    fail_count = len(failed_proxies_with_reason)
     success_pct = (success_count / total * 100) if total > 0 else 0
     fail_pct = (fail_count / total * 100) if total > 0 else 0
     
@@ -247,33 +316,34 @@ def run_concurrent_checks_display(proxies, check_function, max_workers, fail_fil
     
     console.print(Panel(summary_table, title="[bold]Test Results Summary[/bold]", border_style="cyan", box=ROUNDED))
     
-    if failed_proxies_with_reason:
-        with open(fail_file, "w") as f:
-            for p, _ in failed_proxies_with_reason:
-                f.write(p + "\n")
-        
+    if good_file and success_count:
+        console.print(f"\n[green]{success_count} passed proxies saved to '{good_file}'[/green]")
+    
+    if fail_count:
         console.print(f"\n[yellow]{fail_count} failed proxies saved to '{fail_file}'[/yellow]")
         
-        # Error breakdown table (top 10 only)
-        if len(failed_proxies_with_reason) > 0:
-            error_table = Table(
-                title="[bold red]Failure Analysis (Top 10)[/bold red]",
-                box=ROUNDED,
-                border_style="red",
-                show_header=True,
-                header_style="bold white"
-            )
-            error_table.add_column("Proxy", style="cyan", width=40)
-            error_table.add_column("Reason", style="yellow")
-            
-            for proxy, reason in failed_proxies_with_reason[:10]:
-                proxy_display = proxy.split('@')[1] if '@' in proxy else proxy
-                if len(proxy_display) > 35:
-                    proxy_display = proxy_display[:32] + "..."
-                error_table.add_row(proxy_display, reason)
-            
-            console.print()
-            console.print(error_table)
+        # Error breakdown table (top 10 reasons only)
+        error_table = Table(
+            title="[bold red]Failure Analysis (Top 10)[/bold red]",
+            box=ROUNDED,
+            border_style="red",
+            show_header=True,
+            header_style="bold white"
+        )
+        error_table.add_column("Reason", style="yellow")
+        error_table.add_column("Count", justify="right", width=16)
+        error_table.add_column("Example Proxy", style="cyan", width=30)
+        
+        top_reasons = sorted(reason_counts.items(), key=lambda item: item[1], reverse=True)[:10]
+        for reason, count in top_reasons:
+            proxy = reason_examples[reason]
+            proxy_display = proxy.split('@')[1] if '@' in proxy else proxy
+            if len(proxy_display) > 28:
+                proxy_display = proxy_display[:25] + "..."
+            error_table.add_row(reason, f"{count} ({count / fail_count * 100:.1f}%)", proxy_display)
+        
+        console.print()
+        console.print(error_table)
     
     return good_proxies
 